@@ -1,14 +1,36 @@
 import click
 import sys
 import os
+import logging
 
 try:
     import config_parser
-    import docker_controller
 except ImportError:
     print("Error: No se encontraron los módulos 'config_parser.py' o 'docker_controller.py'.") # Deben estar en el mismo directorio
     sys.exit(1)
 
+def _import_docker_controller():
+    """
+    Importa 'docker_controller' solo cuando un comando va a usar Docker
+    El paquete 'docker' es pesado de importar: así '--help' y los errores
+    de argumentos responden sin pagar ese costo
+    """
+    try:
+        import docker_controller
+    except ImportError:
+        print("Error: No se encontraron los módulos 'config_parser.py' o 'docker_controller.py'.") # Deben estar en el mismo directorio
+        sys.exit(1)
+    return docker_controller
+
+def _configure_logging(verbose: bool):
+    """
+    Envía los mensajes de 'docker_controller' a stdout tal cual (sin prefijos de nivel)
+    Con 'verbose' se muestran también los de nivel DEBUG, solo de este módulo y no
+    los de las librerías (urllib3, docker)
+    """
+    logging.basicConfig(level=logging.INFO, format='%(message)s', stream=sys.stdout)
+    logging.getLogger('docker_controller').setLevel(logging.DEBUG if verbose else logging.INFO)
+
 # Definición del Grupo de Comandos Principal
 
 @click.group()
@@ -30,8 +52,13 @@ def cli():
     required=True,
     help='Ruta al archivo docker-compose.yml o manifiesto personalizado'
 )
+@click.option(
+    '--verbose', '-v',
+    is_flag=True,
+    help='Muestra la salida de la construcción de imágenes.'
+)
 
-def deploy(file):
+def deploy(file, verbose):
     """
     Despliega un nuevo entorno de pruebas basado en un archivo de configuración.
     """
@@ -50,7 +77,11 @@ def deploy(file):
         click.secho(f" ERROR al analizar el archivo YML: {e}", fg="red")
         sys.exit(1)
 
+    # La salida de los builds se emite por 'logging' a nivel DEBUG
+    _configure_logging(verbose)
+
     # Llamar al controlador de Docker para el despliegue
+    docker_controller = _import_docker_controller()
     try:
         # Se pasa la configuración y el directorio base 
         base_dir = os.path.dirname(file)
@@ -85,6 +116,7 @@ def teardown(env_name):
         return
 
     #  Llamar al Controlador de Docker para la Destrucción
+    docker_controller = _import_docker_controller()
     try:
         docker_controller.destroy_environment(env_name)
         click.secho(f" Entorno '{env_name}' destruido exitosamente.", fg="green", bold=True)
@@ -104,8 +136,13 @@ def teardown(env_name):
     required=True,
     help='Ruta al archivo de configuración YML original del entorno.'
 )
+@click.option(
+    '--verbose', '-v',
+    is_flag=True,
+    help='Muestra también el detalle de cada ciclo (métricas de CPU, esperas de escalado).'
+)
 @click.argument('env_name')
-def monitor(file, env_name):
+def monitor(file, env_name, verbose):
     """
     Inicia el monitoreo (Self-Healing) para un entorno ya desplegado
     
@@ -126,7 +163,11 @@ def monitor(file, env_name):
         click.secho(f" ERROR al analizar el archivo YML: {e}", fg="red")
         sys.exit(1)
 
+    # Los mensajes del monitoreo salen por 'logging'
+    _configure_logging(verbose)
+
     # Se inicia el bucle de monitoreo
+    docker_controller = _import_docker_controller()
     try:
         click.echo(f"\n  Iniciando modo de monitoreo para '{env_name}'...")
         click.echo(" (Presiona Ctrl+C para detener el agente y el monitoreo)")
@@ -1,4 +1,110 @@
 import yaml
+import os
+import pickle
+import getpass
+import hashlib
+import tempfile
+
+# Se usa el parser en C de libyaml si está disponible (mucho más rápido)
+# CSafeLoader es funcionalmente idéntico a SafeLoader: no instancia objetos arbitrarios
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Prefijo del directorio de caché para configuraciones ya analizadas (uno por usuario)
+# La ruta completa se resuelve en _get_cache_dir, no al importar el módulo
+_CACHE_DIR_PREFIX = "autotest-cfg-cache-"
+
+# Forma parte de la clave de caché: se incrementa si cambian la validación o los valores
+# por defecto, para no reutilizar resultados generados con reglas antiguas
+_CACHE_VERSION = b"4"
+
+
+def _get_cache_dir():
+    """
+    Devuelve el directorio de caché, creándolo si no existe
+    Devuelve None si no se puede usar de forma segura (ej: pertenece a otro usuario)
+    o si no se puede determinar: en ese caso simplemente no se usa la caché
+    """
+    try:
+        if hasattr(os, 'getuid'):
+            # El uid siempre existe, aunque no tenga entrada en passwd (contenedores, CI con --user)
+            suffix = str(os.getuid())
+        else:
+            suffix = getpass.getuser() # Windows: no hay uid
+        cache_dir = os.path.join(tempfile.gettempdir(), f"{_CACHE_DIR_PREFIX}{suffix}")
+
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+        # Solo se confía en archivos pickle de un directorio propio y no accesible por otros
+        if hasattr(os, 'getuid'):
+            st = os.stat(cache_dir)
+            if st.st_uid != os.getuid() or st.st_mode & 0o077:
+                return None
+        return cache_dir
+    except Exception:
+        return None
+
+
+def _cache_path(data: bytes):
+    """
+    Calcula la ruta del archivo de caché para un contenido concreto del YML
+    La clave es un hash del contenido: archivos idénticos en distintos directorios
+    comparten entrada, y tocar el archivo sin cambiarlo no invalida la caché
+    """
+    cache_dir = _get_cache_dir()
+    if cache_dir is None:
+        return None
+
+    key = hashlib.blake2b(_CACHE_VERSION + data, digest_size=8).hexdigest()
+    return os.path.join(cache_dir, f"autotest-cfg-{key}.pkl")
+
+
+def _read_cache(cache_path: str):
+    """Devuelve la configuración guardada en caché, o None si no existe o está corrupta."""
+    try:
+        with open(cache_path, 'rb') as f:
+            return pickle.load(f)
+    except Exception:
+        return None
+
+
+def _write_cache(cache_path: str, config_data: dict):
+    """
+    Guarda la configuración ya validada en caché
+    Se escribe a un archivo temporal y se renombra para que otro proceso nunca lea un archivo a medias
+    Un fallo al escribir la caché no debe impedir el despliegue, por eso se ignora
+    """
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(config_data, f, protocol=5)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+# Campos obligatorios de 'health_check' según su 'type'
+_HC_REQUIRED = {
+    'http_get': ('endpoint',),
+    'tcp_connect': ('port',),
+}
+
+# Valores por defecto de 'health_check' si el YML no los define
+_HC_DEFAULTS = {'retries': 3, 'interval': 15}
+
+# Campos obligatorios de cada regla de optimización y un ejemplo para el mensaje de error
+_RULE_REQUIRED = (
+    ('metric', "'cpu_usage'"),
+    ('threshold', "70"),
+    ('action', "'scale_up'"),
+)
+
+# Valores admitidos de 'pull_policy' (por defecto 'if-not-present')
+_PULL_POLICIES = ('always', 'if-not-present')
+
+# Valores por defecto de cada regla de optimización
+# Si no dice cuántas réplicas añadir, asumimos 1
+_RULE_DEFAULTS = {'replicas': 1}
 
 def _validate_and_set_defaults(config: dict):
     """
@@ -10,60 +116,75 @@ def _validate_and_set_defaults(config: dict):
         return # No hay servicios que validar
 
     for service_name, service_config in config.get('services', {}).items():
+        pull_policy = service_config.get('pull_policy')
+        if pull_policy is not None and pull_policy not in _PULL_POLICIES:
+            raise ValueError(f"Servicio '{service_name}': 'pull_policy' debe ser 'always' o 'if-not-present'.")
+
         # Continuar solo si el servicio define un health_check
-        if 'health_check' in service_config:
-            hc_config = service_config['health_check']
-            
+        hc_config = service_config.get('health_check')
+        if hc_config is not None:
             if 'type' not in hc_config:
                 raise ValueError(f"Servicio '{service_name}': 'health_check' debe definir un 'type' (ej: 'http_get' o 'tcp_connect')")
 
             hc_type = hc_config['type']
-            
-            # Validar campos requeridos según el tipo
-            if hc_type == 'http_get':
-                if 'endpoint' not in hc_config:
-                    raise ValueError(f"Servicio '{service_name}': health_check de tipo 'http_get' debe definir 'endpoint'")
-            elif hc_type == 'tcp_connect':
-                if 'port' not in hc_config:
-                    raise ValueError(f"Servicio '{service_name}': health_check de tipo 'tcp_connect' debe definir 'port'")
-            else:
+
+            # Validar campos requeridos según el tipo con una sola búsqueda en la tabla
+            required = _HC_REQUIRED.get(hc_type)
+            if required is None:
                 raise ValueError(f"Servicio '{service_name}': 'health_check' tiene un 'type' no válido: {hc_type}.")
 
+            missing = [field for field in required if field not in hc_config]
+            if missing:
+                raise ValueError(f"Servicio '{service_name}': health_check de tipo '{hc_type}' debe definir '{missing[0]}'")
+
+            # 'reload_signal' es opcional: la señal que recarga el servicio sin reiniciarlo (ej: SIGHUP)
+            reload_signal = hc_config.get('reload_signal')
+            if reload_signal is not None and not isinstance(reload_signal, (str, int)):
+                raise ValueError(f"Servicio '{service_name}': 'reload_signal' debe ser el nombre o el número de una señal (ej: 'SIGHUP')")
+
             # Valores por defecto
-            # Si el YML no los define se usan estos valores
-            hc_config.setdefault('retries', 3)
-            hc_config.setdefault('interval', 15)
-        
-        if 'optimization_rules' in service_config:
-            rules = service_config['optimization_rules']
-            
+            for key, value in _HC_DEFAULTS.items():
+                if key not in hc_config:
+                    hc_config[key] = value
+
+            # 'retries' es un entero y 'interval' un número de segundos, ambos positivos
+            # (bool es subclase de int, por eso se descarta aparte)
+            retries = hc_config['retries']
+            if isinstance(retries, bool) or not isinstance(retries, int) or retries < 1:
+                raise ValueError(f"Servicio '{service_name}': 'retries' debe ser un entero mayor que 0.")
+
+            interval = hc_config['interval']
+            if isinstance(interval, bool) or not isinstance(interval, (int, float)) or not 0 < interval < float('inf'):
+                raise ValueError(f"Servicio '{service_name}': 'interval' debe ser un número de segundos mayor que 0 (ej: 15).")
+
+        rules = service_config.get('optimization_rules')
+        if rules is not None:
             # Asegurarse de que sea una lista 
             if not isinstance(rules, list):
                 raise ValueError(f"Servicio '{service_name}': 'optimization_rules' debe ser una lista.")
 
             for i, rule in enumerate(rules):
                 # Validar campos obligatorios
-                if 'metric' not in rule:
-                    raise ValueError(f"Servicio '{service_name}', regla de optimización #{i+1}: falta el campo 'metric' (ej: 'cpu_usage').")
-                
-                if 'threshold' not in rule:
-                    raise ValueError(f"Servicio '{service_name}', regla de optimización #{i+1}: falta el campo 'threshold' (ej: 70).")
-                
-                if 'action' not in rule:
-                    raise ValueError(f"Servicio '{service_name}', regla de optimización #{i+1}: falta el campo 'action' (ej: 'scale_up').")
+                for field, example in _RULE_REQUIRED:
+                    if field not in rule:
+                        raise ValueError(f"Servicio '{service_name}', regla de optimización #{i+1}: falta el campo '{field}' (ej: {example}).")
 
                 # Validar que el threshold sea un número
                 if not isinstance(rule['threshold'], (int, float)):
                      raise ValueError(f"Servicio '{service_name}', regla #{i+1}: 'threshold' debe ser un número.")
 
                 # Establecer valores por defecto
-                # Si no dice cuántas réplicas añadir, asumimos 1
-                rule.setdefault('replicas', 1)
+                for key, value in _RULE_DEFAULTS.items():
+                    if key not in rule:
+                        rule[key] = value
 
 def load_config(file_path: str) -> dict:
     """
     Carga y analiza un archivo de configuración YML de forma segura
 
+    El resultado ya validado se guarda en una caché en disco indexada por un hash
+    del contenido, así invocaciones repetidas no vuelven a analizar el YML
+
     Args:
         file_path (str): La ruta completa al archivo .yml que se va a leer
 
@@ -77,33 +198,51 @@ def load_config(file_path: str) -> dict:
         FileNotFoundError: Si el archivo no se encuentra (manejado por 'click'
                            en agente.py, pero se propaga si ocurre)
     """
-    
+
+    # Se lee el archivo completo como bytes en una sola llamada
+    # libyaml decodifica UTF-8 de forma nativa y es más rápido sobre un buffer contiguo
     # 'with' asegura que el archivo se cierre correctamente incluso si ocurre un error
-    with open(file_path, 'r', encoding='utf-8') as stream:
+    with open(file_path, 'rb') as f:
+        data = f.read()
+
+    # Si este contenido ya se analizó antes, se reutiliza el resultado en caché
+    cache_path = _cache_path(data)
+    if cache_path is not None:
+        cached = _read_cache(cache_path)
+        if cached is not None:
+            return cached
+
+    try:
+        config_data = yaml.load(data, Loader=_YAML_LOADER)
+
+        # Si el archivo YML está completamente vacío, yaml.load devuelve None
+        # Devolvemos un diccionario vacío para que 'agente.py' pueda manejarlo consistentemente
+        if config_data is None:
+            config_data = {}
+
         try:
-            config_data = yaml.safe_load(stream)
-            
-            # Si el archivo YML está completamente vacío, safe_load devuelve None
-            # Devolvemos un diccionario vacío para que 'agente.py' pueda manejarlo consistentemente
-            if config_data is None:
-                return {}
-            
-            try:
-                _validate_and_set_defaults(config_data) # Se validad la estructura y establece los defaults
-            except ValueError as e:
-                raise Exception(f"Error de validación de configuración: {e}")
-                
-            return config_data
-            
-        except yaml.YAMLError as e:
-            # Si el YML está mal formado, PyYAML nos da detalles
-            # Se captura el error y se relanza como una Excepción más clara para que 'agente.py' la muestre al usuario
-            
-            error_context = ""
-            # 'problem_mark' nos da la ubicación del error en el archivo
-            if hasattr(e, 'problem_mark'):
-                mark = e.problem_mark
-                error_context = f" (Error detectado cerca de la línea {mark.line + 1}, columna {mark.column + 1})"
-            
-            # Se lanza una nueva excepción con un mensaje más descriptivo
-            raise Exception(f"Error de sintaxis en el archivo YML{error_context}: {e.problem}")
\ No newline at end of file
+            _validate_and_set_defaults(config_data) # Se validad la estructura y establece los defaults
+        except ValueError as e:
+            raise Exception(f"Error de validación de configuración: {e}")
+
+        # Solo se guardan en caché configuraciones válidas
+        if cache_path is not None:
+            _write_cache(cache_path, config_data)
+
+        return config_data
+
+    except yaml.YAMLError as e:
+        # Si el YML está mal formado, PyYAML nos da detalles
+        # Se captura el error y se relanza como una Excepción más clara para que 'agente.py' la muestre al usuario
+
+        error_context = ""
+        # 'problem_mark' nos da la ubicación del error en el archivo
+        if hasattr(e, 'problem_mark'):
+            mark = e.problem_mark
+            error_context = f" (Error detectado cerca de la línea {mark.line + 1}, columna {mark.column + 1})"
+
+        # Los errores de codificación (ReaderError) no tienen 'problem', sino 'reason'
+        problem = getattr(e, 'problem', None) or getattr(e, 'reason', e)
+
+        # Se lanza una nueva excepción con un mensaje más descriptivo
+        raise Exception(f"Error de sintaxis en el archivo YML{error_context}: {problem}")
\ No newline at end of file
@@ -1,10 +1,27 @@
 import docker
 import os
-import uuid
+import sys
+import secrets
 import time
 import requests
+from requests.adapters import HTTPAdapter
 import socket
-from docker.errors import NotFound, APIError, ImageNotFound
+import select
+import errno
+import functools
+import collections
+import threading
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from docker.errors import NotFound, APIError, ImageNotFound, BuildError
+from docker.utils import parse_repository_tag
+
+
+# El monitoreo escribe con 'logging': el formato no se evalúa si el nivel está desactivado
+# y la salida se configura desde agente.py (nivel DEBUG con 'monitor -v')
+log = logging.getLogger(__name__)
 
 
 class EnvironmentNotFound(Exception):
@@ -13,6 +30,145 @@ class EnvironmentNotFound(Exception):
 
 # Constante para las etiquetas 
 ENV_LABEL = "autotest.env.name"
+# Etiquetas de cada contenedor con su servicio y su rol ('primary' o 'replica'),
+# para poder consultar las réplicas de un servicio con un filtro en el daemon
+SERVICE_LABEL = "autotest.service"
+ROLE_LABEL = "autotest.role"
+# Etiqueta de las imágenes construidas con el hash de su contexto de build
+BUILD_HASH_LABEL = "autotest.buildhash"
+
+# Cliente de Docker compartido, se crea la primera vez que se necesita
+# El lock evita que dos hilos lo creen (y hagan ping) a la vez
+_client = None
+_client_lock = threading.Lock()
+
+# Datos normalizados de cada servicio del YML, resueltos una sola vez por comando
+ServiceSpec = collections.namedtuple(
+    'ServiceSpec',
+    ['name', 'image', 'build', 'pull_policy', 'environment', 'port_bindings', 'target_port', 'health_check', 'opt_rules']
+)
+
+# Datos estáticos de cada servicio monitoreado, calculados una vez al iniciar el monitoreo
+ServicePlan = collections.namedtuple(
+    'ServicePlan',
+    ['name', 'container_name', 'spec', 'hc_rule', 'probe', 'opt_rules', 'retries', 'interval', 'network_key']
+)
+
+# Destino de un chequeo de salud, resuelto una vez por servicio:
+# - direct_port: puerto del contenedor si se sondea su IP interna (None si no)
+# - host_url / host_address: destino por 127.0.0.1 para 'http_get' / 'tcp_connect'
+ProbeSpec = collections.namedtuple(
+    'ProbeSpec',
+    ['kind', 'direct_port', 'path', 'host_url', 'host_address']
+)
+
+# Escalado con ventana deslizante: solo se escala si al menos _SCALE_MIN_HOT_SAMPLES de
+# las últimas _SCALE_WINDOW muestras de CPU superan el umbral, y como mucho una vez
+# cada _SCALE_COOLDOWN segundos por servicio (un pico aislado no crea réplicas)
+_SCALE_WINDOW = 5
+_SCALE_MIN_HOT_SAMPLES = 3
+_SCALE_COOLDOWN = 60
+
+# Eventos de contenedor que cambian su estado o su IP y que sigue el monitoreo
+_CONTAINER_EVENTS = ("start", "die", "destroy")
+
+# Réplicas pausadas que se mantienen en reserva por cada servicio que escala
+# Ej: AUTOTEST_WARM_REPLICAS=0 desactiva la reserva
+def _read_warm_replicas() -> int:
+    """Lee AUTOTEST_WARM_REPLICAS; un valor inválido no impide importar el módulo"""
+    value = os.environ.get("AUTOTEST_WARM_REPLICAS", "1")
+    try:
+        return max(int(value), 0)
+    except ValueError:
+        log.warning("AUTOTEST_WARM_REPLICAS='%s' no es un entero; se usa 1.", value)
+        return 1
+
+_WARM_REPLICAS = _read_warm_replicas()
+
+# Tiempo máximo que espera un ciclo de monitoreo por los chequeos de salud (segundos)
+# Cada sondeo tiene su propio timeout de 5s; este límite solo protege el ciclo
+_HEALTH_CHECK_CYCLE_TIMEOUT = 15
+
+# Sesión HTTP compartida por los chequeos 'http_get'
+# Mantiene conexiones keep-alive con cada servicio en vez de abrir una por sondeo
+_HC_SESSION = requests.Session()
+_HC_SESSION.mount("http://", HTTPAdapter(pool_connections=32, pool_maxsize=64, max_retries=0))
+
+# Sondeo directo a la IP interna de los contenedores (ver _can_probe_container_ip)
+# Ej: AUTOTEST_DIRECT_PROBE=0 fuerza los chequeos por el puerto publicado en 127.0.0.1
+_DIRECT_PROBE_ENABLED = os.environ.get("AUTOTEST_DIRECT_PROBE", "1") != "0"
+
+# Mirror de registro opcional (pull-through cache) para las imágenes de Docker Hub
+# Ej: AUTOTEST_REGISTRY_MIRROR=registry.local
+_REGISTRY_MIRROR = os.environ.get("AUTOTEST_REGISTRY_MIRROR")
+
+# Conexiones simultáneas al daemon que admite el cliente (por defecto docker-py usa 10)
+# Debe cubrir los hilos de los pools de deploy (8 pulls + 4 builds) y de teardown (16)
+_DOCKER_POOL_SIZE = 32
+
+
+def _get_client():
+    """
+    Devuelve el cliente de Docker del módulo, creándolo y verificando la conexión
+    solo la primera vez. Así el rollback de deploy_environment y las llamadas
+    sucesivas reutilizan la misma conexión.
+    Es seguro llamarla desde varios hilos: el ping solo se hace al crear el cliente
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None: # Otro hilo pudo crearlo mientras se esperaba el lock
+                try:
+                    client = docker.from_env(max_pool_size=_DOCKER_POOL_SIZE)
+                    client.ping() # Verifica que la conexión es exitosa
+                except Exception:
+                    raise ConnectionError("No se pudo conectar al Docker Engine")
+                _client = client
+    return _client
+
+
+def close_client():
+    """
+    Cierra el cliente de Docker compartido y su pool de conexiones
+    La siguiente llamada que necesite Docker creará (y verificará) uno nuevo
+    """
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+def _parse_services(config: dict) -> list:
+    """
+    Convierte la sección 'services' del YML en una lista de ServiceSpec
+    Se llama una vez al entrar en cada comando, así las búsquedas y los valores
+    por defecto de cada servicio no se repiten en el despliegue, el monitoreo y el escalado
+    """
+    specs = []
+    for service_name, service_config in config.get('services', {}).items():
+        # docker-py espera {'container_port/protocolo': host_port}
+        # 'rpartition' devuelve una tupla fija sin crear una lista por cada mapeo,
+        # y un mapeo sin ':' (ej: "80") queda con host_port vacío, que Docker asigna al arrancar
+        port_bindings = {
+            f"{container_port}/tcp": host_port
+            for host_port, _, container_port in (
+                str(port_mapping).rpartition(':') for port_mapping in service_config.get('ports', ())
+            )
+        }
+
+        specs.append(ServiceSpec(
+            name=service_name,
+            image=service_config.get('image'),
+            build=service_config.get('build'),
+            pull_policy=service_config.get('pull_policy', 'if-not-present'),
+            environment=service_config.get('environment', []),
+            port_bindings=port_bindings,
+            target_port=_resolve_port(service_config),
+            health_check=service_config.get('health_check'),
+            opt_rules=service_config.get('optimization_rules'),
+        ))
+    return specs
 
 
 def deploy_environment(config: dict, base_dir: str) -> (str, dict): # type: ignore
@@ -32,15 +188,11 @@ def deploy_environment(config: dict, base_dir: str) -> (str, dict): # type: igno
             - El nombre único del entorno generado (env_name)
             - Un diccionario con los servicios desplegados y sus detalles
     """
-    try:
-        # Conectarse a la API de Docker Engine
-        client = docker.from_env()
-        client.ping() # Verifica que la conexión es exitosa
-    except Exception:
-        raise ConnectionError("No se pudo conectar al Docker Engine")
+    # Conectarse a la API de Docker Engine
+    client = _get_client()
 
     # Generar un nombre único para este entorno y sus etiquetas
-    env_name = f"autotest-env-{uuid.uuid4().hex[:8]}"
+    env_name = f"autotest-env-{secrets.token_hex(4)}"
     labels = {ENV_LABEL: env_name}
 
     deployed_services = {}
@@ -50,72 +202,225 @@ def deploy_environment(config: dict, base_dir: str) -> (str, dict): # type: igno
         network_name = f"{env_name}-net"
         network = client.networks.create(network_name, labels=labels)
 
-        # Iterar y desplegar cada servicio
-        for service_name, service_config in config.get('services', {}).items():
-            
-            container_name = f"{env_name}-{service_name}"
-            
-            # Determinar la imagen a usar (Build vs. Pull)
-            image_name = service_config.get('image')
-            if 'build' in service_config:
+        services = _parse_services(config)
+
+        # Determinar la imagen de cada servicio (Build vs. Pull)
+        build_specs = {}
+        for spec in services:
+            if spec.build:
                 # La ruta de build es relativa al archivo YML
-                build_path = os.path.join(base_dir, service_config['build'])
+                build_path = os.path.join(base_dir, spec.build)
                 if not os.path.isdir(build_path):
                     raise FileNotFoundError(f"El directorio de build '{build_path}' no existe")
-                
-                print(f"Construyendo imagen para '{service_name}' desde {build_path}...")
                 # Se etiqueta la imagen con el nombre del entorno para limpieza futura
-                image_tag = f"{service_name}:{env_name}"
-                image, _ = client.images.build(path=build_path, tag=image_tag, rm=True)
-                image_name = image.id
-            elif image_name:
-                print(f"Haciendo pull de la imagen '{image_name}' para '{service_name}'...")
-                try:
-                    client.images.pull(image_name)
-                except ImageNotFound:
-                    raise Exception(f"La imagen '{image_name}' no fue encontrada")
-            else:
-                raise ValueError(f"El servicio '{service_name}' no define 'image' ni 'build'")
+                build_specs[spec.name] = (build_path, f"{spec.name}:{env_name}")
+            elif not spec.image:
+                raise ValueError(f"El servicio '{spec.name}' no define 'image' ni 'build'")
 
-            # Preparar configuración del contenedor (puertos, env)
-            port_bindings = {}
-            if 'ports' in service_config:
-                for port_mapping in service_config['ports']:
-                    host_port, container_port = port_mapping.split(':')
-                    # docker-py espera {'container_port/protocolo': host_port}
-                    port_bindings[f"{container_port}/tcp"] = host_port
+        # Cada imagen se descarga una sola vez aunque la usen varios servicios;
+        # basta con que uno pida 'pull_policy: always' para forzar la descarga
+        pull_targets = {}
+        for spec in services:
+            if spec.name not in build_specs:
+                pull_targets[spec.image] = pull_targets.get(spec.image, False) or spec.pull_policy == 'always'
 
-            environment_vars = service_config.get('environment', [])
+        # Descargar y construir todas las imágenes en paralelo
+        # Son operaciones independientes entre servicios y limitadas por la red/daemon, no por la CPU
+        with ThreadPoolExecutor(max_workers=max(1, min(8, len(pull_targets)))) as pull_executor, \
+             ThreadPoolExecutor(max_workers=4) as build_executor:
+            pulls = pull_executor.map(
+                lambda item: _pull_image(client, item[0], always=item[1]), pull_targets.items()
+            )
+            builds = build_executor.map(
+                lambda item: _build_image(client, item[0], *item[1]), build_specs.items()
+            )
+            built_images = dict(zip(build_specs, builds))
+            list(pulls)
+
+        # Preparar la configuración de cada contenedor
+        run_kwargs = {}
+        for spec in services:
+            
+            container_name = f"{env_name}-{spec.name}"
+            image_name = built_images.get(spec.name) or spec.image
 
-            # Crear y arrancar el contenedor 
-            print(f"Creando contenedor '{container_name}'...")
-            container = client.containers.run(
+            # Los puertos y el entorno ya vienen resueltos en el ServiceSpec
+            run_kwargs[spec.name] = dict(
                 image=image_name,
                 name=container_name,
-                labels=labels,                     # Esencial para el teardown
+                labels={**labels, SERVICE_LABEL: spec.name, ROLE_LABEL: "primary"}, # Esencial para el teardown
                 network=network.name,              # Conectar a nuestra red aislada
-                ports=port_bindings,               # Mapear puertos
-                environment=environment_vars,      # Establecer variables de entorno
+                ports=spec.port_bindings,          # Mapear puertos
+                environment=spec.environment,      # Establecer variables de entorno
                 detach=True                        # Correr en segundo plano
             )
 
-            # Se recarga el estado para obtener los puertos asignados
-            container.reload()
-            deployed_services[service_name] = {
-                'id': container.id,
-                'ports': container.ports
-            }
+        # Crear y arrancar todos los contenedores en paralelo
+        # Si alguno falla, el pool espera al resto antes de propagar el error,
+        # así la limpieza encuentra todos los contenedores creados por su etiqueta
+        if run_kwargs:
+            with ThreadPoolExecutor(max_workers=min(8, len(run_kwargs))) as executor:
+                started = dict(zip(run_kwargs, executor.map(
+                    lambda kwargs: _run_container(client, kwargs), run_kwargs.values()
+                )))
+
+            for service_name, (container, ports) in started.items():
+                deployed_services[service_name] = {
+                    'id': container.id,
+                    'ports': ports
+                }
 
         return env_name, deployed_services
 
     except Exception as e:
         # Limpieza en caso de fallo
         # Si algo falla a mitad del despliegue, se destruye lo que se haya creado
-        print(f"Error durante el despliegue: {e}. Revirtiendo cambios...")
+        log.error("Error durante el despliegue: %s. Revirtiendo cambios...", e)
         destroy_environment(env_name, client) # Reutilizamos la función de destrucción
         raise # Volvemos a lanzar la excepción para que agente.py la reporte
 
 
+def _mirror_repository(repository: str) -> str:
+    """
+    Reescribe un repositorio de Docker Hub para descargarlo desde el mirror configurado
+    Los repositorios que ya indican un registro (ej: 'ghcr.io/...') no se tocan
+
+    Ej: 'nginx' -> 'registry.local/library/nginx'
+    """
+    first, _, rest = repository.partition('/')
+    if rest and ('.' in first or ':' in first or first == 'localhost'):
+        return repository # Ya tiene un registro explícito
+
+    if not rest:
+        repository = f"library/{repository}" # Imagen oficial de Docker Hub
+    return f"{_REGISTRY_MIRROR.rstrip('/')}/{repository}"
+
+
+def _pull_image(client, image_name: str, always: bool = False):
+    """
+    Descarga una imagen desde el registro si no existe ya en local
+    (o siempre, si el servicio define 'pull_policy: always')
+    Se ejecuta en un hilo del pool de pulls de deploy_environment
+    """
+    # Si la imagen ya está en local se evita el round-trip al registro
+    if not always:
+        try:
+            client.images.get(image_name)
+            return
+        except ImageNotFound:
+            pass
+
+    # Las referencias por digest se descargan tal cual: no se pueden re-etiquetar
+    if not _REGISTRY_MIRROR or '@' in image_name:
+        log.info("Haciendo pull de la imagen '%s'...", image_name)
+        try:
+            client.images.pull(image_name)
+        except ImageNotFound:
+            raise Exception(f"La imagen '{image_name}' no fue encontrada")
+        return
+
+    repository, tag = parse_repository_tag(image_name)
+    tag = tag or 'latest'
+    pull_repository = _mirror_repository(repository)
+
+    log.info("Haciendo pull de la imagen '%s:%s'...", pull_repository, tag)
+    try:
+        client.images.pull(pull_repository, tag=tag)
+    except ImageNotFound:
+        raise Exception(f"La imagen '{image_name}' no fue encontrada")
+
+    if pull_repository != repository:
+        # Se etiqueta con el nombre original para que 'containers.run' la encuentre
+        client.api.tag(f"{pull_repository}:{tag}", repository, tag)
+
+
+def _hash_build_context(build_path: str) -> str:
+    """
+    Calcula un hash del contexto de build a partir de la ruta, tamaño y mtime de cada archivo
+    No se interpreta '.dockerignore': incluir archivos de más solo puede provocar
+    reconstrucciones innecesarias, nunca reutilizar una imagen desactualizada
+    """
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(build_path):
+        dirs.sort() # Orden determinista del recorrido
+        for file_name in sorted(files):
+            file_path = os.path.join(root, file_name)
+            try:
+                st = os.stat(file_path)
+            except OSError:
+                continue # Enlace roto o archivo eliminado durante el recorrido
+            rel_path = os.path.relpath(file_path, build_path)
+            digest.update(f"{rel_path}\0{st.st_size}\0{st.st_mtime_ns}\n".encode('utf-8', 'surrogatepass'))
+    return digest.hexdigest()
+
+
+def _build_image(client, service_name: str, build_path: str, image_tag: str) -> str:
+    """
+    Construye la imagen de un servicio y devuelve su ID
+    Si ya existe una imagen construida con el mismo contexto, se reutiliza sin reconstruir
+    Se ejecuta en un hilo del pool de builds de deploy_environment
+    """
+    context_hash = _hash_build_context(build_path)
+
+    cached_images = client.images.list(filters={"label": f"{BUILD_HASH_LABEL}={context_hash}"})
+    if cached_images:
+        image = cached_images[0]
+        log.info("Reutilizando imagen de '%s' (contexto de build sin cambios)...", service_name)
+        # Se etiqueta con el nombre del entorno, igual que una imagen recién construida
+        repository, tag = parse_repository_tag(image_tag)
+        image.tag(repository, tag)
+        return image.id
+
+    # El encabezado se emite por el mismo canal y en el mismo momento que la salida del build
+    log.info("Construyendo imagen para '%s' desde %s...", service_name, build_path)
+    # Se consume la salida del build a medida que llega, sin acumular el log completo
+    # en memoria, y se corta en cuanto el daemon informa el primer error
+    image_id = None
+    for chunk in client.api.build(
+        path=build_path, tag=image_tag, rm=True, decode=True,
+        labels={BUILD_HASH_LABEL: context_hash}
+    ):
+        if 'error' in chunk:
+            raise BuildError(chunk['error'], [chunk])
+        if 'stream' in chunk and chunk['stream'].strip():
+            # Cada línea se descarta tras emitirla (visible con 'deploy -v'); se prefija con el
+            # servicio porque los builds corren en paralelo
+            log.debug("    [%s] %s", service_name, chunk['stream'].rstrip())
+        if 'ID' in chunk.get('aux', {}):
+            image_id = chunk['aux']['ID']
+
+    # Daemons antiguos no envían el ID en 'aux': se obtiene por la etiqueta
+    if image_id is None:
+        image_id = client.images.get(image_tag).id
+    return image_id
+
+
+def _run_container(client, run_kwargs: dict):
+    """
+    Crea y arranca un contenedor
+    Se ejecuta en un hilo del pool de arranque de deploy_environment
+
+    Returns:
+        tuple (Container, dict): El contenedor y sus puertos publicados,
+                                 con la misma forma que 'container.ports'
+    """
+    log.info("Creando contenedor '%s'...", run_kwargs['name'])
+    container = client.containers.run(**run_kwargs)
+
+    port_bindings = run_kwargs['ports']
+    if all(port_bindings.values()):
+        # Los puertos ya se conocen porque los definimos nosotros, no hace falta consultar al daemon
+        ports = {
+            container_port: [{'HostIp': '0.0.0.0', 'HostPort': host_port}]
+            for container_port, host_port in port_bindings.items()
+        }
+    else:
+        # Docker asignó algún puerto del host en tiempo de ejecución, hay que leerlo
+        container.reload()
+        ports = container.ports
+    return container, ports
+
+
 def destroy_environment(env_name: str, client=None):
     """
     Encuentra y destruye todos los recursos (contenedores, redes) 
@@ -126,128 +431,265 @@ def destroy_environment(env_name: str, client=None):
     Args:
         env_name (str): El nombre del entorno a destruir
         client (docker.DockerClient, optional): Un cliente de Docker existente
-                                                Si es None, se crea uno nuevo
+                                                Si es None, se usa el cliente compartido
     """
     if client is None:
-        try:
-            client = docker.from_env()
-            client.ping()
-        except Exception:
-            raise ConnectionError("No se pudo conectar al Docker Engine")
+        client = _get_client()
 
-    # Definir el filtro para encontrar recursos por nuestra etiqueta
-    label_filter = {"label": f"{ENV_LABEL}={env_name}"}
+    # Filtros para encontrar recursos por nuestra etiqueta
+    container_filter, network_filter = _resource_filters(env_name)
 
-    # Encontrar y parar/eliminar todos los contenedores
+    # Encontrar todos los recursos del entorno con una sola consulta por tipo
+    # Las dos consultas son independientes: se lanzan a la vez y se esperan ambas
     try:
-        containers = client.containers.list(all=True, filters=label_filter)
-        if not containers:
-            # Si no hay contenedores, comprobamos redes por si algo quedó huérfano
-            networks = client.networks.list(filters=label_filter)
-            if not networks:
-                # Si no hay ni contenedores ni redes, el entorno no existe
-                raise EnvironmentNotFound()
-
-        print(f"Encontrados {len(containers)} contenedores. Eliminando...")
-        for container in containers:
-            try:
-                # v=True también elimina volúmenes anónimos asociados
-                container.remove(force=True, v=True) 
-            except NotFound:
-                pass # El contenedor ya fue eliminado
-
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            containers_future = executor.submit(client.containers.list, all=True, filters=container_filter)
+            networks_future = executor.submit(client.networks.list, filters=network_filter)
+            containers = containers_future.result()
+            networks = networks_future.result()
     except NotFound:
         raise EnvironmentNotFound() # El filtro no encontró nada
-    
-    # Encontrar y eliminar todas las redes
+
+    if not containers and not networks:
+        # Si no hay ni contenedores ni redes, el entorno no existe
+        raise EnvironmentNotFound()
+
+    # Parar/eliminar todos los contenedores
+    print(f"Encontrados {len(containers)} contenedores. Eliminando...")
+    # Cada eliminación es una llamada independiente al daemon: se lanzan en paralelo
+    # (un 'prune' de contenedores no borraría sus volúmenes anónimos ni los que siguen en marcha)
+    removals = []
+    if containers:
+        with ThreadPoolExecutor(max_workers=min(16, len(containers))) as executor:
+            removals = [executor.submit(_safe_remove_container, client, container.id) for container in containers]
+
+    # Eliminar todas las redes con un solo 'prune' en el daemon
+    # Una red solo se puede borrar cuando ya no tiene contenedores, por eso va después
     try:
-        networks = client.networks.list(filters=label_filter)
         print(f"Encontradas {len(networks)} redes. Eliminando...")
-        for network in networks:
-            try:
-                network.remove()
-            except NotFound:
-                pass # La red ya fue eliminada
+        if networks:
+            pruned = client.networks.prune(filters={"label": container_filter["label"]})
+            remaining = len(networks) - len(pruned.get('NetworksDeleted') or ())
+            if remaining > 0:
+                raise APIError(f"{remaining} red(es) siguen en uso")
 
     except APIError as e:
         print(f"Error de API al eliminar redes: {e}. Puede requerir limpieza manual.")
 
+    # Propagar cualquier error de las eliminaciones de contenedores (ya terminadas)
+    for removal in removals:
+        removal.result()
+
+@functools.lru_cache(maxsize=256)
+def _resource_filters(env_name: str) -> tuple:
+    """
+    Devuelve los filtros (contenedores, redes) que identifican los recursos de un entorno
+    Se calculan una vez por entorno; los diccionarios devueltos no deben modificarse
+
+    El filtro por nombre permite al daemon descartar antes los recursos de otros entornos
+    """
+    label = f"{ENV_LABEL}={env_name}"
+    container_filter = {"label": label, "name": f"{env_name}-"}
+    network_filter = {"label": label, "name": f"{env_name}-net"}
+    return container_filter, network_filter
+
+
+def _safe_remove_container(client, container_id: str):
+    """Elimina un contenedor ignorando si ya no existe."""
+    try:
+        # v=True también elimina volúmenes anónimos asociados
+        client.api.remove_container(container_id, force=True, v=True)
+    except NotFound:
+        pass # El contenedor ya fue eliminado
+
+
+def _container_name(container) -> str:
+    """
+    Devuelve el nombre de un contenedor, también para los objetos de
+    'containers.list(sparse=True)', que no traen el campo 'Name'
+    """
+    return container.name or container.attrs['Names'][0].lstrip('/')
+
+def _container_ip(container, network_key: str):
+    """
+    Devuelve la IP interna del contenedor en la red del entorno
+    Se lee de los datos ya obtenidos en la consulta del ciclo, sin llamadas al daemon
+    """
+    try:
+        return container.attrs['NetworkSettings']['Networks'][network_key]['IPAddress']
+    except KeyError:
+        return None # El contenedor no está conectado a la red del entorno
+
+def _resolve_port(service_config: dict):
+    """
+    Devuelve el puerto del HOST al que apuntan los chequeos HTTP
+    (el del primer mapeo de 'ports'), o None si el servicio no publica puertos
+    """
+    if not service_config.get('ports'):
+        return None
+    host_port, _, _ = str(service_config['ports'][0]).rpartition(':')
+    return host_port or None
+
+def _resolve_direct_port(spec: ServiceSpec):
+    """
+    Devuelve el puerto del CONTENEDOR al que apunta el chequeo de salud, para sondear
+    su IP interna directamente, o None si no se puede determinar desde 'ports'
+    """
+    if spec.health_check['type'] == 'http_get':
+        container_port = next(iter(spec.port_bindings), None) # El del primer mapeo de 'ports'
+    else:
+        # El 'port' de tcp_connect es un puerto del host: se busca a qué puerto del contenedor apunta
+        host_port = str(spec.health_check['port'])
+        container_port = next(
+            (container_port for container_port, bound in spec.port_bindings.items() if bound == host_port), None
+        )
+    return int(container_port.partition('/')[0]) if container_port else None
+
+def _can_probe_container_ip(client) -> bool:
+    """
+    Indica si el host alcanza directamente las IPs internas de los contenedores, para
+    sondearlas sin pasar por el NAT ni por docker-proxy. Solo ocurre en Linux con el
+    daemon local y no rootless: con Docker Desktop (también desde WSL2), con un daemon
+    remoto (contexto tcp/ssh) o con Docker rootless esas IPs no son accesibles
+    """
+    if not _DIRECT_PROBE_ENABLED or not sys.platform.startswith("linux"):
+        return False
+    # docker-py usa esta URL base solo para sockets unix locales
+    if not client.api.base_url.startswith("http+docker://localhost"):
+        return False
+    try:
+        info = client.info()
+    except Exception:
+        return False
+    if any("rootless" in option for option in info.get('SecurityOptions') or ()):
+        return False
+    return "Docker Desktop" not in (info.get('OperatingSystem') or "")
+
+def _build_probe(spec: ServiceSpec, direct: bool) -> ProbeSpec:
+    """
+    Precalcula el destino del chequeo de salud de un servicio, para que cada sondeo
+    solo tenga que completar la IP del contenedor (o usar la URL ya armada)
+    'direct' indica si se sondea la IP interna del contenedor (ver _can_probe_container_ip)
+    """
+    hc_rule = spec.health_check
+    direct_port = _resolve_direct_port(spec) if direct else None
+
+    if hc_rule['type'] == 'http_get':
+        host_url = f"http://127.0.0.1:{spec.target_port}{hc_rule['endpoint']}" if spec.target_port else None
+        return ProbeSpec('http_get', direct_port, hc_rule['endpoint'], host_url, None)
+    return ProbeSpec(hc_rule['type'], direct_port, None, None, ("127.0.0.1", hc_rule['port']))
+
+def _check_container(container, plan: ServicePlan) -> bool:
+    """
+    Resuelve la IP del contenedor y realiza su chequeo de salud
+    Se ejecuta en el pool de chequeos de monitor_environment
+    """
+    return _perform_health_check(container, _container_ip(container, plan.network_key), plan)
+
 def _perform_health_check(container: docker.models.containers.Container, 
-                          service_config: dict, 
-                          hc_rule: dict) -> bool:
+                          ip_address: str,
+                          plan: ServicePlan) -> bool:
     """
     Realiza un único sondeo de salud a un contenedor
 
     Args:
         container (docker.models.containers.Container): El objeto contenedor de Docker
-        service_config (dict): La configuración del servicio (para encontrar puertos)
-        hc_rule (dict): La regla de health_check del YML.
+        ip_address (str): La IP interna del contenedor, ya resuelta por el llamador
+        plan (ServicePlan): Los datos precalculados del servicio (regla y destino del chequeo)
 
     Returns:
         bool: True si el chequeo es exitoso, False en caso contrario
     """
     
-    # Obtener la IP interna del contenedor en la red
-    try:
-        container.reload() # Asegura que el estado esté actualizado
-        if not container.attrs['State']['Running']:
-            print(f"    - Chequeo fallido: Contenedor '{container.name}' no está 'running'.")
-            return False
-            
-        # Obtener la IP de la primera red que no sea 'bridge'
-        ip_address = None
-        for network_name, network_data in container.attrs['NetworkSettings']['Networks'].items():
-            if network_name != "bridge":
-                ip_address = network_data['IPAddress']
-                break
-        
-        if not ip_address:
-            raise Exception("No se pudo encontrar la IP interna del contenedor.")
+    container_name = _container_name(container)
 
-    except Exception as e:
-        print(f"    - Chequeo fallido: No se pudo obtener estado/IP de '{container.name}': {e}")
+    # El estado viene de la consulta del ciclo de monitoreo, no hace falta recargarlo
+    if container.status != 'running':
+        log.warning("    - Chequeo fallido: Contenedor '%s' no está 'running'.", container_name)
+        return False
+
+    if not ip_address:
+        log.warning("    - Chequeo fallido: No se pudo encontrar la IP interna de '%s'.", container_name)
         return False
 
     # Realizar el chequeo basado en el tipo
-    check_type = hc_rule['type']
+    # Los destinos se resolvieron al crear el plan del servicio (ver _build_probe)
+    hc_rule = plan.hc_rule
+    probe = plan.probe
     
     try:
-        if check_type == 'http_get':
-            # Intentar encontrar el puerto del contenedor desde la config
-            if not service_config.get('ports'):
+        if probe.kind == 'http_get':
+            # Si la IP interna no responde se reintenta por el puerto publicado en 127.0.0.1
+            urls = []
+            if probe.direct_port:
+                urls.append(f"http://{ip_address}:{probe.direct_port}{probe.path}")
+            if probe.host_url:
+                urls.append(probe.host_url)
+            if not urls:
                 raise Exception("http_get requiere que el servicio defina 'ports'")
-            
-            # Tomar el puerto del HOST 
-            host_port = service_config['ports'][0].split(':')[0]
-            endpoint = hc_rule['endpoint']
 
-            url = f"http://127.0.0.1:{host_port}{endpoint}"
-            
-            response = requests.get(url, timeout=5) # Timeout de 5s
+            for url in urls:
+                try:
+                    # Sesión compartida: reutiliza conexiones keep-alive entre ciclos
+                    response = _HC_SESSION.get(url, timeout=(1, 5)) # 1s para conectar, 5s para responder
+                    break
+                except requests.exceptions.ConnectionError:
+                    if url is urls[-1]:
+                        raise
             if 200 <= response.status_code < 300:
                 return True # Éxito
             else:
-                print(f"    - Chequeo HTTP fallido para '{container.name}': URL {url} devolvió status {response.status_code}")
+                log.warning("    - Chequeo HTTP fallido para '%s': URL %s devolvió status %s", container_name, url, response.status_code)
                 return False
 
-        elif check_type == 'tcp_connect':
-            port = hc_rule['port']
-            with socket.create_connection(("127.0.0.1", port), timeout=5):
-                return True # Éxito (conexión establecida)
+        elif probe.kind == 'tcp_connect':
+            if probe.direct_port:
+                try:
+                    _tcp_connect((ip_address, probe.direct_port), timeout=1)
+                    return True # Éxito (conexión establecida)
+                except socket.error:
+                    pass # Se reintenta por el puerto publicado en 127.0.0.1
+            _tcp_connect(probe.host_address, timeout=1) # Mismo límite de conexión que los chequeos HTTP
+            return True # Éxito (conexión establecida)
 
     except requests.exceptions.ConnectionError:
-        print(f"    - Chequeo HTTP fallido para '{container.name}': No se pudo conectar a {url}")
+        log.warning("    - Chequeo HTTP fallido para '%s': No se pudo conectar a %s", container_name, url)
         return False
     except socket.error:
-        print(f"    - Chequeo TCP fallido para '{container.name}': No se pudo conectar al puerto {hc_rule['port']}")
+        log.warning("    - Chequeo TCP fallido para '%s': No se pudo conectar al puerto %s", container_name, hc_rule['port'])
         return False
     except Exception as e:
-        print(f"    - Chequeo fallido para '{container.name}': {e}")
+        log.warning("    - Chequeo fallido para '%s': %s", container_name, e)
         return False
         
     return False
 
 
+# Códigos de connect_ex que indican que la conexión sigue en curso (socket no bloqueante)
+_CONNECT_IN_PROGRESS = {0, errno.EINPROGRESS, errno.EWOULDBLOCK, getattr(errno, 'WSAEWOULDBLOCK', errno.EWOULDBLOCK)}
+
+def _tcp_connect(address: tuple, timeout: float):
+    """
+    Abre y cierra una conexión TCP sin bloquear el hilo más de 'timeout' segundos
+    Un rechazo (RST) o un destino inalcanzable se detectan en cuanto llegan, sin esperar
+    el timeout; lanza OSError (socket.error) si la conexión no se establece
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.setblocking(False)
+        err = sock.connect_ex(address)
+        if err not in _CONNECT_IN_PROGRESS:
+            raise OSError(err, os.strerror(err))
+        if err:
+            # En Windows un connect rechazado se notifica en el conjunto de excepciones,
+            # no en el de escritura; en ambos casos el motivo queda en SO_ERROR
+            _, writable, failed = select.select([], [sock], [sock], timeout)
+            if not writable and not failed:
+                raise socket.timeout(f"Sin respuesta de {address[0]}:{address[1]}")
+            err = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+            if err:
+                raise OSError(err, os.strerror(err))
+
+
 def monitor_environment(env_name: str, config: dict):
     """
     Inicia el bucle de monitoreo y autocorrección para un entorno.
@@ -258,155 +700,417 @@ def monitor_environment(env_name: str, config: dict):
         config (dict): El diccionario de configuración completo (para las reglas).
     """
     
-    try:
-        client = docker.from_env()
-        client.ping()
-    except Exception:
-        raise ConnectionError("No se pudo conectar al Docker Engine.")
+    client = _get_client()
 
     # Se crea un mapa de estado para rastrear fallos consecutivos
     failure_counts = {}
-    services_to_monitor = []
 
-    # Se identifica qué servicios necesitan monitoreo
-    for service_name, service_config in config.get('services', {}).items():
-        if 'health_check' in service_config:
-            failure_counts[service_name] = 0
-            services_to_monitor.append(service_name)
-            print(f"  Monitoreando servicio '{service_name}'...")
+    # Se identifica qué servicios necesitan monitoreo y se precalculan sus datos estáticos
+    # una sola vez, fuera del bucle de monitoreo
+    probe_container_ip = _can_probe_container_ip(client)
+    monitor_plan = []
+    for spec in _parse_services(config):
+        if spec.health_check is not None:
+            hc_rule = spec.health_check
+            monitor_plan.append(ServicePlan(
+                name=spec.name,
+                container_name=f"{env_name}-{spec.name}",
+                spec=spec,
+                hc_rule=hc_rule,
+                probe=_build_probe(spec, probe_container_ip),
+                opt_rules=spec.opt_rules,
+                retries=hc_rule['retries'],
+                interval=hc_rule['interval'],
+                network_key=f"{env_name}-net", # La red que crea deploy_environment
+            ))
+            failure_counts[spec.name] = 0
+            log.info("  Monitoreando servicio '%s'...", spec.name)
     
-    if not services_to_monitor:
-        print("  No hay servicios con 'health_check' definidos. El monitoreo no se iniciará.")
+    if not monitor_plan:
+        log.info("  No hay servicios con 'health_check' definidos. El monitoreo no se iniciará.")
         return
 
-    print(f"--- Iniciando bucle de monitoreo para '{env_name}' ---")
+    # Un hilo por servicio con reglas de optimización mantiene abierto el flujo de stats
+    # de Docker y guarda la última muestra, en vez de abrir una conexión por ciclo
+    latest_stats = {}
+    cpu_history = {plan.name: collections.deque(maxlen=_SCALE_WINDOW) for plan in monitor_plan}
+    last_scale = dict.fromkeys(failure_counts, float('-inf'))
+    signaled = set() # Servicios a los que ya se envió su 'reload_signal' sin que se recuperaran
+    stats_pumps = {}
+    for plan in monitor_plan:
+        if plan.opt_rules:
+            try:
+                container = client.containers.get(plan.container_name)
+            except NotFound:
+                continue # El flujo se abrirá en el bucle si el contenedor aparece más tarde
+            stats_pumps[plan.name] = _start_stats_pump(container, latest_stats, plan.name)
+
+    log.info("--- Iniciando bucle de monitoreo para '%s' ---", env_name)
     
     initial_grace_period = 10 # 10 segundos de gracia
-    print(f"  Dando un período de gracia inicial de {initial_grace_period} segundos para el arranque...")
+    log.info("  Dando un período de gracia inicial de %s segundos para el arranque...", initial_grace_period)
     time.sleep(initial_grace_period)
 
+    container_filter, _ = _resource_filters(env_name)
+    health_check_pool = ThreadPoolExecutor(max_workers=min(32, len(monitor_plan)))
+
+    # El estado de los contenedores se mantiene con el flujo de eventos de Docker en vez de
+    # consultarlo en cada ciclo. Se suscribe antes del listado inicial para no perder eventos
+    events = client.events(decode=True, filters={
+        "type": "container", "label": container_filter["label"], "event": list(_CONTAINER_EVENTS)
+    })
+    containers_by_name = _list_containers_by_name(client, container_filter)
+    event_watcher = threading.Thread(
+        target=_watch_container_events, args=(client, events, containers_by_name), daemon=True
+    )
+    event_watcher.start()
+
+    # Reserva de réplicas pausadas para los servicios que escalan: un escalado reanuda una
+    # réplica ya creada en lugar de crearla en frío, y la reserva se repone en segundo plano
+    warm_replicas = {}
+    warm_pool = ThreadPoolExecutor(max_workers=2)
+    scalable_plans = [
+        plan for plan in monitor_plan
+        if any(rule['action'] == 'scale_up' for rule in plan.opt_rules or ())
+    ]
+    for plan in scalable_plans:
+        for _ in range(_WARM_REPLICAS):
+            warm_pool.submit(_start_standby_replica, client, env_name, plan.spec, plan.network_key, warm_replicas)
+
+    # Cada servicio se chequea según su propio 'interval': el bucle duerme hasta que
+    # vence el próximo chequeo y solo sondea los servicios que ya tocan
+    next_due = dict.fromkeys(failure_counts, time.monotonic())
+
     # Iniciar el bucle de monitoreo (se ejecuta para siempre)
     try:
         while True:
-            # Pausa global entre cada ciclo de revisión
-            time.sleep(10) 
+            # Pausa hasta el próximo chequeo pendiente
+            wait = min(next_due.values()) - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+
+            now = time.monotonic()
+            due_plans = [plan for plan in monitor_plan if next_due[plan.name] <= now]
+            for plan in due_plans:
+                # Período fijo: el próximo chequeo se programa desde el plazo anterior, no desde
+                # ahora, así lo que tarda cada ciclo no se acumula como deriva
+                next_due[plan.name] += plan.interval
+                if next_due[plan.name] <= now:
+                    # Se perdió un período completo: se avisa y se reprograma sin ponerse al día en ráfaga
+                    log.warning("  El monitoreo va atrasado: '%s' se chequea %.1fs tarde.",
+                                plan.name, now - next_due[plan.name] + plan.interval)
+                    next_due[plan.name] = now + plan.interval
             
-            print(f"\n--- Ciclo de chequeo - {time.ctime()} ---")
+            # Las trazas de cada ciclo van a nivel DEBUG (se ven con 'monitor -v')
+            log.debug("\n--- Ciclo de chequeo - %s ---", time.ctime())
+
+            # Si el flujo de eventos se cortó, se vuelve a una sola consulta por ciclo
+            if not event_watcher.is_alive():
+                containers_by_name = _list_containers_by_name(client, container_filter)
 
-            for service_name in services_to_monitor:
-                service_config = config['services'][service_name]
-                hc_rule = service_config['health_check']
-                container_name = f"{env_name}-{service_name}"
+            # Lanzar los chequeos de todos los servicios en paralelo: el ciclo tarda
+            # lo que el chequeo más lento, no la suma de todos
+            # El hilo de eventos puede cambiar 'containers_by_name' en cualquier momento: cada
+            # servicio usa el contenedor que se leyó al lanzar su chequeo
+            cycle_deadline = time.monotonic() + _HEALTH_CHECK_CYCLE_TIMEOUT
+            health_checks = {}
+            for plan in due_plans:
+                container = containers_by_name.get(plan.container_name)
+                if container is not None:
+                    health_checks[plan.name] = (container, health_check_pool.submit(_check_container, container, plan))
+
+            # Los resultados y la autocorrección se procesan en serie en este hilo
+            for plan in due_plans:
+                service_name = plan.name
+                container_name = plan.container_name
 
                 try:
-                    # Obtener el contenedor (puede fallar si fue eliminado)
-                    container = client.containers.get(container_name)
+                    # Obtener el contenedor chequeado (puede no estar si fue eliminado)
+                    health_check = health_checks.get(service_name)
+                    if health_check is None:
+                        raise NotFound(container_name)
+                    container, future = health_check
                     
-                    # Realizar el chequeo
-                    is_healthy = _perform_health_check(container, service_config, hc_rule)
+                    # Esperar el resultado del chequeo
+                    is_healthy = future.result(
+                        timeout=max(0, cycle_deadline - time.monotonic())
+                    )
 
                     if is_healthy:
                         # Si estaba fallando y ahora está bien, notificar
                         if failure_counts[service_name] > 0:
-                            print(f"  Servicio '{service_name}' se ha recuperado.")
+                            log.info("  Servicio '%s' se ha recuperado.", service_name)
                         failure_counts[service_name] = 0
+                        signaled.discard(service_name)
 
                         # Solo optimizamos si el contenedor está saludable
-                        if 'optimization_rules' in service_config:
-                            opt_rules = service_config['optimization_rules']
-                            
-                            # Obtener stats (stream=False devuelve una instantánea)
-                            stats = container.stats(stream=False)
+                        if plan.opt_rules:
+                            # Si el flujo de stats se cortó (ej: el contenedor se reinició o se recreó),
+                            # se vuelve a abrir sobre el contenedor actual para los próximos ciclos
+                            pump = stats_pumps.get(service_name)
+                            if pump is None or not pump.is_alive():
+                                stats_pumps[service_name] = _start_stats_pump(container, latest_stats, service_name)
+
+                            # Última muestra del flujo de stats
+                            stats = latest_stats.get(service_name)
+                            if stats is None:
+                                # Aún no hay muestras del flujo (stream=False devuelve una instantánea)
+                                stats = container.stats(stream=False)
                             cpu_percent = _calculate_cpu_percent(stats)
                             
                             # Imprimir métrica actual 
-                            print(f"     {service_name}: CPU {cpu_percent:.2f}%")
+                            log.debug("     %s: CPU %.2f%%", service_name, cpu_percent)
+                            samples = cpu_history[service_name]
+                            samples.append(cpu_percent)
 
-                            for rule in opt_rules:
+                            for rule in plan.opt_rules:
                                 if rule['metric'] == 'cpu_usage' and rule['action'] == 'scale_up':
                                     if cpu_percent > rule['threshold']:
-                                        print(f"     ALERTA: CPU ({cpu_percent:.2f}%) superó umbral ({rule['threshold']}%)")
-                                        # Obtener red del contenedor principal
-                                        net_name = list(container.attrs['NetworkSettings']['Networks'].keys())[0]
-                                        _scale_service_up(client, env_name, service_name, service_config, net_name)
+                                        log.warning("     ALERTA: CPU (%.2f%%) superó umbral (%s%%)", cpu_percent, rule['threshold'])
+                                        hot_samples = sum(sample > rule['threshold'] for sample in samples)
+                                        if hot_samples < _SCALE_MIN_HOT_SAMPLES:
+                                            log.debug("     Esperando carga sostenida antes de escalar (%d/%d muestras)", hot_samples, _SCALE_MIN_HOT_SAMPLES)
+                                        elif time.monotonic() - last_scale[service_name] < _SCALE_COOLDOWN:
+                                            log.debug("     Escalado reciente de '%s', se omite", service_name)
+                                        else:
+                                            # La réplica se conecta a la red del entorno, ya conocida por el plan
+                                            used_standby = _scale_service_up(
+                                                client, env_name, plan.spec, plan.network_key, warm_replicas
+                                            )
+                                            # Solo se repone la réplica de la reserva que se consumió,
+                                            # así la reserva no crece por encima de _WARM_REPLICAS
+                                            if used_standby:
+                                                warm_pool.submit(
+                                                    _start_standby_replica, client, env_name, plan.spec,
+                                                    plan.network_key, warm_replicas
+                                                )
+                                            last_scale[service_name] = time.monotonic()
                     
                     else:
                         # Incrementar fallo y notificar
                         failure_counts[service_name] += 1
-                        print(f"  Servicio '{service_name}' falló chequeo. Conteo: {failure_counts[service_name]}/{hc_rule['retries']}")
+                        log.warning("  Servicio '%s' falló chequeo. Conteo: %d/%d", service_name, failure_counts[service_name], plan.retries)
                 
                 except NotFound:
-                    print(f"  Servicio '{service_name}': Contenedor '{container_name}' no encontrado. Marcando como fallo.")
+                    log.warning("  Servicio '%s': Contenedor '%s' no encontrado. Marcando como fallo.", service_name, container_name)
+                    failure_counts[service_name] += 1
+
+                except FutureTimeoutError:
+                    log.warning("  Servicio '%s': El chequeo no terminó a tiempo. Marcando como fallo.", service_name)
                     failure_counts[service_name] += 1
                 
                 except Exception as e:
-                    print(f"  Error chequeando '{service_name}': {e}. Marcando como fallo.")
+                    log.error("  Error chequeando '%s': %s. Marcando como fallo.", service_name, e)
                     failure_counts[service_name] += 1
 
                 # Lógica de Autocorrección (Self-Healing)
-                if failure_counts[service_name] >= hc_rule['retries']:
-                    print(f"  AUTOCORRECCIÓN: Servicio '{service_name}' alcanzó {failure_counts[service_name]} fallos. Reiniciando...")
+                if failure_counts[service_name] >= plan.retries:
+                    reload_signal = plan.hc_rule.get('reload_signal')
+                    container_to_restart = containers_by_name.get(container_name)
+
+                    # Si el servicio admite recarga por señal, se intenta primero (mucho más rápido
+                    # que un reinicio); si el siguiente chequeo vuelve a fallar, se reinicia
+                    if (reload_signal and service_name not in signaled
+                            and container_to_restart is not None and container_to_restart.status == 'running'):
+                        log.warning("  AUTOCORRECCIÓN: Servicio '%s' alcanzó %d fallos. Enviando señal %s...", service_name, failure_counts[service_name], reload_signal)
+                        try:
+                            container_to_restart.kill(signal=reload_signal)
+                            signaled.add(service_name)
+                            # Un solo fallo más basta para pasar al reinicio
+                            failure_counts[service_name] = plan.retries - 1
+                            continue
+                        except APIError as e:
+                            log.error("  No se pudo enviar la señal a '%s': %s", container_name, e)
+
+                    log.warning("  AUTOCORRECCIÓN: Servicio '%s' alcanzó %d fallos. Reiniciando...", service_name, failure_counts[service_name])
+                    signaled.discard(service_name)
                     try:
-                        # Re-obtener el contenedor por si acaso
-                        container_to_restart = client.containers.get(container_name)
+                        # Se reutiliza el contenedor obtenido en la consulta del ciclo
+                        if container_to_restart is None:
+                            raise NotFound(container_name)
                         container_to_restart.restart()
-                        print(f"  Contenedor '{container_name}' reiniciado.")
+                        log.info("  Contenedor '%s' reiniciado.", container_name)
                         # Resetear contador después de la acción
                         failure_counts[service_name] = 0
                     except NotFound:
-                        print(f"  AUTOCORRECCIÓN FALLIDA: No se pudo reiniciar '{container_name}' porque no se encontró.")
+                        log.error("  AUTOCORRECCIÓN FALLIDA: No se pudo reiniciar '%s' porque no se encontró.", container_name)
                     except APIError as e:
-                        print(f"  AUTOCORRECCIÓN FALLIDA: Error de API al reiniciar '{container_name}': {e}")
+                        log.error("  AUTOCORRECCIÓN FALLIDA: Error de API al reiniciar '%s': %s", container_name, e)
                         
     except KeyboardInterrupt:
-        print("\n--- Bucle de monitoreo interrumpido por el usuario (Ctrl+C) ---")
+        log.info("\n--- Bucle de monitoreo interrumpido por el usuario (Ctrl+C) ---")
+    finally:
+        events.close()
+        health_check_pool.shutdown(wait=False)
+        # Las réplicas en reserva que no llegaron a usarse se eliminan al salir
+        warm_pool.shutdown(wait=True, cancel_futures=True)
+        for standby in warm_replicas.values():
+            for container in standby:
+                # Un error con una réplica no debe impedir eliminar las demás
+                try:
+                    _safe_remove_container(client, container.id)
+                except APIError as e:
+                    log.error("  No se pudo eliminar la réplica en reserva '%s': %s", container.name, e)
+
+def _list_containers_by_name(client, container_filter: dict) -> dict:
+    """
+    Trae el estado y las redes de todos los contenedores del entorno con una sola consulta
+    (sparse=True evita que docker-py haga un 'inspect' por cada uno)
+    """
+    return {
+        _container_name(c): c
+        for c in client.containers.list(all=True, filters=container_filter, sparse=True)
+    }
+
+def _watch_container_events(client, events, containers_by_name: dict):
+    """
+    Mantiene 'containers_by_name' al día a partir del flujo de eventos de Docker
+    Solo se consulta al daemon cuando un contenedor arranca o se detiene, no en cada ciclo
+    Se ejecuta en un hilo daemon durante todo el monitoreo
+    """
+    try:
+        for event in events:
+            # Un evento inesperado o un error del daemon no debe detener el seguimiento
+            try:
+                actor = event.get('Actor') or {}
+                name = (actor.get('Attributes') or {}).get('name')
+                if event.get('Action') == 'destroy':
+                    containers_by_name.pop(name, None)
+                    continue
+                try:
+                    # Se refresca el contenedor: su estado y su IP pueden haber cambiado
+                    containers_by_name[name] = client.containers.get(actor['ID'])
+                except NotFound:
+                    containers_by_name.pop(name, None)
+            except Exception as e:
+                log.warning("  - No se pudo procesar el evento de Docker %s: %s", event, e)
+    except Exception:
+        pass # Se cortó el flujo (o se cerró al terminar el monitoreo)
+
+def _start_stats_pump(container, latest_stats: dict, service_name: str) -> threading.Thread:
+    """Lanza el hilo daemon que mantiene la última muestra de stats de un servicio"""
+    thread = threading.Thread(target=_stats_pump, args=(container, latest_stats, service_name), daemon=True)
+    thread.start()
+    return thread
+
+def _stats_pump(container, latest_stats: dict, service_name: str):
+    """
+    Lee de forma continua las estadísticas de un contenedor y guarda solo la última muestra
+    Se ejecuta en un hilo daemon durante todo el monitoreo; la asignación en el
+    diccionario es atómica, así que el bucle principal puede leerla sin bloqueo
+    """
+    try:
+        for stats in container.stats(stream=True, decode=True):
+            latest_stats[service_name] = stats
+    except Exception:
+        pass # El contenedor desapareció o se cortó la conexión
+    # Sin flujo activo, el bucle vuelve a pedir instantáneas
+    latest_stats.pop(service_name, None)
 
 def _calculate_cpu_percent(stats: dict) -> float:
     """
     Calcula el porcentaje de uso de CPU a partir de las estadísticas de Docker
+    La estructura de stats puede variar según versión de Docker API: los campos
+    que faltan cuentan como 0 en lugar de lanzar KeyError
     """
-    try:
-        cpu_delta = stats['cpu_stats']['cpu_usage']['total_usage'] - stats['precpu_stats']['cpu_usage']['total_usage']
-        system_delta = stats['cpu_stats']['system_cpu_usage'] - stats['precpu_stats']['system_cpu_usage']
-        
-        if system_delta > 0.0 and cpu_delta > 0.0:
-            # Obtener número de núcleos
-            online_cpus = stats['cpu_stats'].get('online_cpus', 1) or len(stats['cpu_stats']['cpu_usage']['percpu_usage'])
-            return (cpu_delta / system_delta) * online_cpus * 100.0
-    except KeyError:
-        pass # La estructura de stats puede variar según versión de Docker API
+    cpu_stats = stats.get('cpu_stats') or {}
+    precpu_stats = stats.get('precpu_stats') or {}
+    cpu_usage = cpu_stats.get('cpu_usage') or {}
+
+    precpu_total = (precpu_stats.get('cpu_usage') or {}).get('total_usage')
+    precpu_system = precpu_stats.get('system_cpu_usage')
+    if precpu_total is None or precpu_system is None:
+        return 0.0 # Sin muestra previa no hay delta que calcular
+
+    cpu_delta = cpu_usage.get('total_usage', 0) - precpu_total
+    system_delta = cpu_stats.get('system_cpu_usage', 0) - precpu_system
+
+    if system_delta > 0.0 and cpu_delta > 0.0:
+        # Obtener número de núcleos
+        online_cpus = cpu_stats.get('online_cpus', 1) or len(cpu_usage.get('percpu_usage') or ())
+        return (cpu_delta / system_delta) * online_cpus * 100.0
     return 0.0
 
-def _scale_service_up(client, env_name, service_name, service_config, network_name):
+def _run_replica(client, env_name, spec: ServiceSpec, network_name, container_name: str):
     """
-    Despliega una nueva réplica del servicio (Escalado Horizontal).
+    Crea y arranca una réplica del servicio en la red del entorno
     NOTA: Las réplicas NO mapean puertos al host para evitar conflictos.
     """
-    replica_id = uuid.uuid4().hex[:6]
+    # Resolver Imagen (Igual que en deploy)
+    image_name = spec.image
+    # Si era un build, intentamos usar la imagen ya taggeada del entorno
+    if spec.build:
+        image_name = f"{spec.name}:{env_name}"
+    
+    # Configuración
+    labels = {ENV_LABEL: env_name, "autotest.type": "replica", SERVICE_LABEL: spec.name, ROLE_LABEL: "replica"}
+
+    # Crear contenedor (SIN PUERTOS)
+    return client.containers.run(
+        image=image_name,
+        name=container_name,
+        labels=labels,
+        network=network_name,
+        environment=spec.environment,
+        detach=True
+    )
+
+def _start_standby_replica(client, env_name, spec: ServiceSpec, network_name, warm_replicas: dict):
+    """
+    Crea una réplica y la deja pausada en la reserva del servicio, lista para activarse
+    Se ejecuta en segundo plano, en el pool de reservas de monitor_environment
+    """
+    container_name = f"{env_name}-{spec.name}-replica-{secrets.token_hex(3)}"
+    container = None
+    try:
+        container = _run_replica(client, env_name, spec, network_name, container_name)
+        container.pause()
+        warm_replicas.setdefault(spec.name, []).append(container)
+    except Exception as e:
+        log.error("     Error al preparar réplica en reserva de '%s': %s", spec.name, e)
+        # Si llegó a crearse no está en la reserva: se elimina para no dejarla corriendo sin control
+        if container is not None:
+            try:
+                _safe_remove_container(client, container.id)
+            except APIError:
+                pass
+
+def _scale_service_up(client, env_name, spec: ServiceSpec, network_name, warm_replicas: dict = None):
+    """
+    Despliega una nueva réplica del servicio (Escalado Horizontal).
+    Si hay una réplica pausada en reserva se reanuda (milisegundos); si no, se crea una nueva
+
+    Returns:
+        bool: True si se sacó una réplica de la reserva (haya podido reanudarse o no)
+    """
+    service_name = spec.name
+
+    standby = (warm_replicas or {}).get(service_name)
+    used_standby = bool(standby)
+    if standby:
+        container = standby.pop()
+        log.warning("     ESCALANDO: Reanudando réplica en reserva '%s'...", container.name)
+        try:
+            container.unpause()
+            log.info("     Réplica '%s' iniciada exitosamente.", container.name)
+            return True
+        except APIError as e:
+            log.error("     No se pudo reanudar la réplica '%s': %s", container.name, e)
+            # Ya no está en la reserva: se elimina para no dejarla huérfana hasta el teardown
+            try:
+                _safe_remove_container(client, container.id)
+            except APIError:
+                pass
+
+    replica_id = secrets.token_hex(3)
     container_name = f"{env_name}-{service_name}-replica-{replica_id}"
-    print(f"     ESCALANDO: Creando réplica '{container_name}'...")
+    log.warning("     ESCALANDO: Creando réplica '%s'...", container_name)
 
     try:
-        # Resolver Imagen (Igual que en deploy)
-        image_name = service_config.get('image')
-        # Si era un build, intentamos usar la imagen ya taggeada del entorno
-        if 'build' in service_config:
-            image_name = f"{service_name}:{env_name}"
-        
-        # Configuración
-        environment_vars = service_config.get('environment', [])
-        labels = {ENV_LABEL: env_name, "autotest.type": "replica"}
-
-        # Crear contenedor (SIN PUERTOS)
-        client.containers.run(
-            image=image_name,
-            name=container_name,
-            labels=labels,
-            network=network_name,
-            environment=environment_vars,
-            detach=True
-        )
-        print(f"     Réplica '{container_name}' iniciada exitosamente.")
+        _run_replica(client, env_name, spec, network_name, container_name)
+        log.info("     Réplica '%s' iniciada exitosamente.", container_name)
         
     except Exception as e:
-        print(f"     Error al escalar servicio '{service_name}': {e}")
\ No newline at end of file
+        log.error("     Error al escalar servicio '%s': %s", service_name, e)
+
+    return used_standby